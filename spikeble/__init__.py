@@ -9,17 +9,20 @@ async def run_fn(
     """Run a Python function on the SPIKE Prime hub."""
     from .spike import logger
     from ._utils import fn_to_string
+    name = program.__name__ + ".py"
+    source = fn_to_string(program)
     try:
-        # call function and see if any front-side errors trigger
-        program()
+        # syntax-check only; running it locally would repeat its work
+        # (and side effects) before the hub ever sees it
+        compile(source, name, "exec")
     except Exception as e:
-        logger.error(f"Error occurred while running program: {e}")
+        logger.error(f"Error compiling {name}: {e}")
         return
     
     await run_str(
-        fn_to_string(program),
+        source,
         slot=slot,
-        name=program.__name__ + ".py",
+        name=name,
         stay_connected=stay_connected
     )
 
@@ -39,15 +42,17 @@ async def run_file(
         logger.error(f"File not found: {program_path}")
         return
 
-    program_str = Path(program_path).read_text()
+    # compile() accepts the raw bytes, so the file is uploaded as read
+    # rather than decoded to str and encoded again
+    program = Path(program_path).read_bytes()
     try:
-        compile(program_str, program_path, "exec")
+        compile(program, program_path, "exec")
     except Exception as e:
         logger.error(f"Error compiling {program_path}: {e}")
         return
     
-    await run_str(
-        program_str,
+    await _run_bytes(
+        program,
         slot=slot,
         name=Path(program_path).name,
         stay_connected=stay_connected
@@ -61,12 +66,32 @@ async def run_str(
     stay_connected: bool = False,
 ):
     """Run a Python string as code on the SPIKE Prime hub."""
+    await _run_bytes(
+        program_str.encode("utf-8"),
+        slot=slot,
+        name=name,
+        stay_connected=stay_connected
+    )
+
+async def _run_bytes(
+    program: bytes,
+    *,
+    slot: int = 0,
+    name: str = "program.py",
+    stay_connected: bool = False,
+):
+    import asyncio
     from .spike import Spike
     async with Spike(timeout=10, slot=slot) as hub:
-        await hub.get_info()
-        await hub.enable_notifications()
-        await hub.clear_slot()
-        await hub.upload_program(program_str.encode("utf-8"), name=name)
+        await hub.get_info()  # packet sizes are needed before anything else
+        try:
+            async with asyncio.TaskGroup() as tg:
+                tg.create_task(hub.enable_notifications())
+                tg.create_task(hub.clear_slot())
+        except ExceptionGroup as eg:
+            # surface the request's own error, as sequential awaits did
+            raise eg.exceptions[0] from None
+        await hub.upload_program(program, name=name)
         await hub.start_program()
         if stay_connected:
             try:
@@ -5,7 +5,10 @@ def crc(data: bytes, seed=0, align=4):
     """
     Calculate the CRC32 of data with an optional seed and alignment.
     """
+    # CRC32 is streamed, so padding is folded in separately rather than
+    # concatenated; this also accepts memoryview slices without copying.
+    result = _crc32(data, seed)
     remainder = len(data) % align
     if remainder:
-        data += b"\x00" * (align - remainder)
-    return _crc32(data, seed)
+        result = _crc32(b"\x00" * (align - remainder), result)
+    return result
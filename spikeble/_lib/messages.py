@@ -218,6 +218,11 @@ DEVICE_MESSAGE_MAP = {
     0x0E: ("3x3", "<BB9B"),
 }
 
+_DEVICE_STRUCTS = {
+    msg_id: (name, struct.Struct(fmt))
+    for msg_id, (name, fmt) in DEVICE_MESSAGE_MAP.items()
+}
+
 
 class DeviceNotification(BaseMessage):
     ID = 0x3C
@@ -229,26 +234,27 @@ class DeviceNotification(BaseMessage):
         self.unknown_id: int | None = None
         self.raw_tail: bytes | None = None
 
-        data = payload[:]
-        while data:
-            msg_id = data[0]
-            spec = DEVICE_MESSAGE_MAP.get(msg_id)
+        # walk the payload by offset instead of re-slicing the remainder
+        offset, end = 0, len(payload)
+        while offset < end:
+            msg_id = payload[offset]
+            spec = _DEVICE_STRUCTS.get(msg_id)
             if not spec:
                 self.unknown_id = msg_id
-                self.raw_tail = data  # preserve for reverse-engineering
-                # print(f"Unknown message: 0x{msg_id:02X}, tail={data[:16].hex(' ')}")
+                # preserve for reverse-engineering
+                self.raw_tail = payload[offset:]
+                # print(f"Unknown message: 0x{msg_id:02X}, "
+                #       f"tail={self.raw_tail[:16].hex(' ')}")
                 break
 
             name, fmt = spec
-            sz = struct.calcsize(fmt)
-            if len(data) < sz:
+            if end - offset < fmt.size:
                 # truncated; stop cleanly
-                self.raw_tail = data
+                self.raw_tail = payload[offset:]
                 break
 
-            values = struct.unpack(fmt, data[:sz])
-            self.messages.append((name, values))
-            data = data[sz:]
+            self.messages.append((name, fmt.unpack_from(payload, offset)))
+            offset += fmt.size
 
     @staticmethod
     def deserialize(data: bytes) -> DeviceNotification:
@@ -283,8 +289,12 @@ KNOWN_MESSAGES = {
 }
 
 
+# One slot per possible ID byte, so lookup is a plain index with no hashing
+_BY_ID = tuple(KNOWN_MESSAGES.get(i) for i in range(256))
+
+
 def deserialize(data: bytes):
-    message_type = data[0]
-    if message_type in KNOWN_MESSAGES:
-        return KNOWN_MESSAGES[message_type].deserialize(data)
-    raise ValueError(f"Unknown message: {data.hex(' ')}")
+    message_cls = _BY_ID[data[0]]
+    if message_cls is None:
+        raise ValueError(f"Unknown message: {data.hex(' ')}")
+    return message_cls.deserialize(data)
@@ -0,0 +1,50 @@
+"""
+Bounded single-producer/single-consumer ring buffer used to hand messages
+from the BLE notification callback to a waiting coroutine.
+"""
+
+import asyncio
+from collections import deque
+
+
+class SpscRing:
+    """
+    Fixed-capacity FIFO backed by a bounded `collections.deque`. When full,
+    `push` overwrites the oldest item instead of growing.
+    """
+
+    __slots__ = ("_items", "_ev")
+
+    def __init__(self, capacity: int = 64):
+        self._items = deque(maxlen=max(1, capacity))
+        self._ev = asyncio.Event()
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def push(self, item) -> bool:
+        """Append an item, returning False if the oldest one was dropped."""
+        items = self._items
+        dropped = len(items) == items.maxlen
+        items.append(item)
+        if len(items) == 1:
+            self._ev.set()
+        return not dropped
+
+    def pop_nowait(self):
+        """Remove and return the oldest item; raise IndexError if empty."""
+        item = self._items.popleft()
+        if not self._items:
+            self._ev.clear()
+        return item
+
+    def clear(self) -> None:
+        """Drop all items in one step instead of popping them one by one."""
+        self._items.clear()
+        self._ev.clear()
+
+    async def pop(self):
+        """Wait for an item, then remove and return it."""
+        while not self._items:
+            await self._ev.wait()
+        return self.pop_nowait()
@@ -1,8 +1,29 @@
 import inspect, textwrap
+from functools import lru_cache
 
 
 def fn_to_string(fn) -> str:
     """Extract function body as a string without the function definition line."""
-    lines, _ = inspect.getsourcelines(fn)  # full function source as lines
-    body = textwrap.dedent("".join(lines[1:]))  # drop function name
+    fn = inspect.unwrap(fn)  # the user's code, not a decorator's wrapper
+    code = getattr(fn, "__code__", None)
+    if code is None:
+        # not a plain function; inspect raises TypeError if it has no source
+        return _source_body(fn)
+    return _code_to_string(code.co_filename, code)
+
+
+@lru_cache(maxsize=32)
+def _code_to_string(filename: str, code) -> str:
+    # code objects compare equal across files when only comments differ,
+    # so the filename is part of the key
+    return _source_body(code)
+
+
+def _source_body(obj) -> str:
+    lines, _ = inspect.getsourcelines(obj)  # full function source as lines
+    # skip decorators, which getsourcelines includes, then the def line
+    start = next(
+        i for i, line in enumerate(lines) if line.lstrip()[:1] != "@"
+    )
+    body = textwrap.dedent("".join(lines[start + 1 :]))  # drop function name
     return body
@@ -1,7 +1,19 @@
 from __future__ import annotations
 import asyncio
 import logging
-from typing import Callable, Awaitable, Optional, Tuple, Type, TypeVar, cast
+from collections import deque
+from contextlib import aclosing
+from typing import (
+    AsyncIterator,
+    Callable,
+    Awaitable,
+    Iterable,
+    Optional,
+    Tuple,
+    Type,
+    TypeVar,
+    cast,
+)
 
 from bleak import BleakClient, BleakScanner
 from bleak.backends.device import BLEDevice
@@ -11,6 +23,7 @@ from bleak.backends.characteristic import BleakGATTCharacteristic
 from ._lib.connection import UUID
 from ._lib import cobs
 from ._lib.crc import crc
+from ._lib.spsc import SpscRing
 from ._lib.messages import *  # BaseMessage, InfoRequest, InfoResponse, etc.
 
 TM = TypeVar("TM", bound="BaseMessage")
@@ -22,9 +35,40 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Bleak normalizes advertised UUIDs to lowercase on most backends; the
+# uppercase form is a cheap fallback for those that don't.
+_SERVICE_UUIDS = frozenset({UUID.SERVICE.lower(), UUID.SERVICE.upper()})
+
 
 class Spike:
     DEVICE_NOTIFICATION_INTERVAL_MS = 5000
+    UPLOAD_WINDOW = 4
+    INBUF_COMPACT_THRESHOLD = 4096
+    INBOX_SIZE = 64
+
+    __slots__ = (
+        "timeout",
+        "slot",
+        "_device",
+        "_client",
+        "_service",
+        "_rx",
+        "_tx",
+        "_connected",
+        "_stop",
+        "_info",
+        "_packet_size",
+        "_pending",
+        "_inbuf",
+        "_inbuf_pos",
+        "_inbox",
+        "_tx_frames",
+        "_tx_ready",
+        "_writer",
+        "_notifications",
+        "_notify_task",
+        "_notify_cb",
+    )
 
     def __init__(self, timeout: int = 10, slot: int = 0) -> None:
         self.timeout = timeout
@@ -35,10 +79,20 @@ class Spike:
         self._service = None
         self._rx = None
         self._tx = None
+        self._connected = False
 
         self._stop = asyncio.Event()
         self._info: Optional[InfoResponse] = None
-        self._pending: Tuple[int, asyncio.Future] = (-1, asyncio.Future())
+        self._packet_size: Optional[int] = None
+        self._pending: dict[int, deque[asyncio.Future]] = {}
+        self._inbuf = bytearray()
+        self._inbuf_pos = 0
+        self._inbox = SpscRing(self.INBOX_SIZE)
+        self._tx_frames: deque[bytes] = deque()
+        self._tx_ready = asyncio.Event()
+        self._writer: Optional[asyncio.Task] = None
+        self._notifications = SpscRing(self.INBOX_SIZE)
+        self._notify_task: Optional[asyncio.Task] = None
         self._notify_cb: Optional[
             Callable[[DeviceNotification], Awaitable[None] | None]
         ] = None
@@ -55,7 +109,9 @@ class Spike:
 
         logger.info("Connecting to SPIKE hub...")
         self._client = BleakClient(
-            self._device, disconnected_callback=self._on_disconnect
+            self._device,
+            disconnected_callback=self._on_disconnect,
+            timeout=self.timeout,
         )
         await self._client.connect()
 
@@ -82,10 +138,23 @@ class Spike:
         if not self._rx or not self._tx:
             raise RuntimeError("SPIKE RX/TX characteristics not found")
 
+        # Drop partial frames and unread messages from a previous connection
+        self._inbuf.clear()
+        self._inbuf_pos = 0
+        self._inbox.clear()
+
         await self._client.start_notify(self._tx, self._on_data)
+        self._connected = True
         logger.info("Connected to SPIKE hub")
 
     async def disconnect(self) -> None:
+        self._connected = False
+        for task in (self._writer, self._notify_task):
+            if task is not None:
+                task.cancel()
+        self._writer = self._notify_task = None
+        self._tx_frames.clear()
+        self._fail_pending(ConnectionError("SPIKE hub disconnected"))
         if self._client and self._client.is_connected:
             await self._client.disconnect()
             logger.info("Disconnected from SPIKE hub")
@@ -93,6 +162,7 @@ class Spike:
     async def get_info(self) -> InfoResponse:
         logger.info("Requesting hub info...")
         self._info = await self._send_request(InfoRequest(), InfoResponse)
+        self._packet_size = self._info.max_packet_size
         logger.info(f"Hub info: {self._info}")
         return self._info
 
@@ -122,29 +192,43 @@ class Spike:
         program: bytes,
         name: str = "program.py",
         slot: Optional[int] = None,
+        window: int = UPLOAD_WINDOW,
     ) -> None:
         s = self.slot if slot is None else slot
         info = self._require_info()
 
+        # Chain the per-chunk CRCs up front: with 4-byte aligned chunks the
+        # final running CRC equals the CRC of the whole program, so the data
+        # is only scanned once.
+        size = info.max_chunk_size
+        view = memoryview(program)
+        chunks = []
+        running_crc = 0
+        for i in range(0, len(program), size):
+            chunk = view[i : i + size]
+            running_crc = crc(chunk, running_crc)
+            chunks.append(TransferChunkRequest(running_crc, bytes(chunk)))
+        total_crc = running_crc if size % 4 == 0 else crc(program)
+
         logger.info(f"Starting file upload to slot {s} as '{name}'")
         start = await self._send_request(
-            StartFileUploadRequest(name, s, crc(program)),
+            StartFileUploadRequest(name, s, total_crc),
             StartFileUploadResponse,
         )
         if not start.success:
             logger.error("StartFileUpload not acknowledged")
             raise RuntimeError("StartFileUpload not acknowledged")
 
-        running_crc = 0
-        for i in range(0, len(program), info.max_chunk_size):
-            chunk = program[i : i + info.max_chunk_size]
-            running_crc = crc(chunk, running_crc)
-            part = await self._send_request(
-                TransferChunkRequest(running_crc, chunk), TransferChunkResponse
-            )
-            if not part.success:
-                logger.error(f"Chunk transfer failed at offset {i}")
-                raise RuntimeError(f"Chunk transfer failed at offset {i}")
+        responses = self._send_pipelined(chunks, TransferChunkResponse, window)
+        async with aclosing(responses):
+            offset = 0
+            async for part in responses:
+                if not part.success:
+                    logger.error(f"Chunk transfer failed at offset {offset}")
+                    raise RuntimeError(
+                        f"Chunk transfer failed at offset {offset}"
+                    )
+                offset += size
         logger.info("File upload complete")
 
     async def start_program(self, slot: Optional[int] = None) -> None:
@@ -162,6 +246,23 @@ class Spike:
         logger.info("Waiting until disconnect...")
         await self._stop.wait()
 
+    async def recv(self, timeout: Optional[float] = None) -> BaseMessage:
+        """Wait for the next unsolicited message, e.g. console output."""
+        if self._inbox:
+            return self._inbox.pop_nowait()
+        async with asyncio.timeout(timeout):
+            return await self._inbox.pop()
+
+    async def recv_many(
+        self, max_n: int = INBOX_SIZE, timeout: Optional[float] = None
+    ) -> list[BaseMessage]:
+        """Wait for at least one message, then drain up to `max_n` of them."""
+        out = [await self.recv(timeout)]
+        inbox = self._inbox
+        while inbox and len(out) < max_n:
+            out.append(inbox.pop_nowait())
+        return out
+
     def on_device_notification(
         self, cb: Callable[[DeviceNotification], Awaitable[None] | None]
     ) -> None:
@@ -176,61 +277,176 @@ class Spike:
 
     @staticmethod
     def _match_service(_dev: BLEDevice, adv: AdvertisementData) -> bool:
-        uuids = adv.service_uuids or []
-        return UUID.SERVICE.lower() in [u.lower() for u in uuids]
+        return not _SERVICE_UUIDS.isdisjoint(adv.service_uuids or ())
 
     def _on_disconnect(self, _client: BleakClient) -> None:
+        self._connected = False
         logger.warning("SPIKE hub disconnected")
+        self._fail_pending(ConnectionError("SPIKE hub disconnected"))
         self._stop.set()
 
     async def _send(self, msg: BaseMessage) -> None:
-        if not self._client or not self._rx:
+        # Cached flag: BleakClient.is_connected may query the backend
+        if not self._connected:
             raise RuntimeError("Not connected")
 
         logger.debug(f"Sending: {msg}")
-        payload = msg.serialize()
-        frame = cobs.pack(payload)
-        packet_size = self._info.max_packet_size if self._info else len(frame)
+        self._tx_frames.append(cobs.pack(msg.serialize()))
+        self._tx_ready.set()
+        if self._writer is None or self._writer.done():
+            self._writer = asyncio.create_task(self._writer_loop())
+
+    async def _writer_loop(self) -> None:
+        # A single writer keeps packets in order while callers only enqueue
+        # frames, so they are not paced by each BLE write.
+        while True:
+            await self._tx_ready.wait()
+            self._tx_ready.clear()
+            while self._tx_frames:
+                # Frames are self-delimiting, so everything queued is written
+                # as one stream and packed into as few full packets as
+                # possible.
+                if len(self._tx_frames) == 1:
+                    frame = self._tx_frames.popleft()
+                else:
+                    frame = b"".join(self._tx_frames)
+                    self._tx_frames.clear()
+                try:
+                    await self._write_frame(frame)
+                except Exception as e:
+                    logger.error(f"Write failed: {e}")
+                    self._fail_pending(e)
+
+    async def _write_frame(self, frame: bytes) -> None:
+        write, rx = self._client.write_gatt_char, self._rx
+        packet_size = self._packet_size or len(frame)
+        if len(frame) <= packet_size:
+            await write(rx, frame, response=False)
+            return
 
+        # Packets must reach the hub in order, so they are written one after
+        # another; slicing a memoryview avoids copying each packet.
+        view = memoryview(frame)
         for i in range(0, len(frame), packet_size):
-            await self._client.write_gatt_char(
-                self._rx, frame[i : i + packet_size], response=False
-            )
+            await write(rx, view[i : i + packet_size], response=False)
+
+    def _fail_pending(self, exc: Exception) -> None:
+        for waiters in self._pending.values():
+            for fut in waiters:
+                if not fut.done():
+                    fut.set_exception(exc)
 
     async def _send_request(self, msg: BaseMessage, resp_t: Type[TM]) -> TM:
-        loop = asyncio.get_event_loop()
-        self._pending = (resp_t.ID, loop.create_future())
-        await self._send(msg)
-        return cast(TM, await self._pending[1])
+        fut = asyncio.get_running_loop().create_future()
+        waiters = self._pending.setdefault(resp_t.ID, deque())
+        waiters.append(fut)
+        try:
+            await self._send(msg)
+            return cast(TM, await fut)
+        finally:
+            if fut in waiters:
+                waiters.remove(fut)
+
+    async def _send_pipelined(
+        self, msgs: Iterable[BaseMessage], resp_t: Type[TM], window: int
+    ) -> AsyncIterator[TM]:
+        """
+        Send `msgs` back-to-back, yielding their responses in order.
+
+        The hub answers requests in order, so responses are matched FIFO and
+        only the oldest is awaited once `window` requests are in flight.
+        Beyond that, throughput is bound by the BLE connection interval
+        negotiated by the OS (on BlueZ, MinConnectionInterval and
+        MaxConnectionInterval in main.conf).
+        """
+        loop = asyncio.get_running_loop()
+        waiters = self._pending.setdefault(resp_t.ID, deque())
+        outstanding: deque[asyncio.Future] = deque()
+        try:
+            for msg in msgs:
+                fut = loop.create_future()
+                waiters.append(fut)
+                outstanding.append(fut)
+                await self._send(msg)
+                if len(outstanding) >= max(1, window):
+                    fut = outstanding.popleft()
+                    yield cast(TM, await asyncio.wait_for(fut, self.timeout))
+            while outstanding:
+                fut = outstanding.popleft()
+                yield cast(TM, await asyncio.wait_for(fut, self.timeout))
+        finally:
+            for fut in outstanding:
+                if fut in waiters:
+                    waiters.remove(fut)
+                if fut.done() and not fut.cancelled():
+                    fut.exception()  # retrieved; the first error was raised
+                fut.cancel()
 
     def _on_data(self, _ch: BleakGATTCharacteristic, data: bytearray) -> None:
-        if not data or data[-1] != cobs.DELIMITER:
-            try:
-                un_xor = bytes(b ^ cobs.XOR for b in data)
-                logger.warning(f"Incomplete message:\n {un_xor}")
-            except Exception:
-                logger.warning("Incomplete message (unpack failed)")
-            return
-
+        # Notifications may carry partial or multiple frames. Complete frames
+        # are consumed by advancing a read cursor; the buffer is only
+        # compacted once drained or once the consumed head grows large.
+        # Unconsumed bytes never contain a delimiter, so the search starts
+        # at the newly received data.
+        buf = self._inbuf
+        scan = len(buf)
+        buf += data
+        find, dispatch, delimiter = buf.find, self._dispatch, cobs.DELIMITER
+        pos = self._inbuf_pos
+        while (idx := find(delimiter, scan)) != -1:
+            frame = buf[pos : idx + 1]
+            pos = scan = idx + 1
+            dispatch(frame)
+
+        if pos >= len(buf):
+            buf.clear()
+            pos = 0
+        elif pos > self.INBUF_COMPACT_THRESHOLD:
+            del buf[:pos]
+            pos = 0
+        self._inbuf_pos = pos
+
+    def _dispatch(self, frame: bytes) -> None:
         try:
-            msg = deserialize(cobs.unpack(data))
+            msg = deserialize(cobs.unpack(frame))
             logger.debug(f"Received: {msg}")
         except Exception as e:
             logger.error(f"Decode error: {e}")
             return
 
-        if msg.ID == self._pending[0] and not self._pending[1].done():
-            self._pending[1].set_result(msg)
+        # Responses go to the oldest live waiter for their ID; waiters that
+        # timed out or were cancelled are skipped.
+        waiters = self._pending.get(type(msg).ID)
+        while waiters:
+            fut = waiters.popleft()
+            if not fut.done():
+                fut.set_result(msg)
+                return
 
         if isinstance(msg, DeviceNotification):
             if self._notify_cb:
-                res = self._notify_cb(msg)
-                if asyncio.iscoroutine(res):
-                    asyncio.create_task(res)
+                # One long-lived consumer runs the callback rather than a
+                # new task per notification
+                if not self._notifications.push(msg):
+                    logger.debug("Callback lagging, dropped a notification")
+                if self._notify_task is None or self._notify_task.done():
+                    self._notify_task = asyncio.create_task(self._notify_loop())
             else:
                 updates = sorted(msg.messages, key=lambda x: x[1])
                 for name, value in updates:
                     logger.info(f" - {name:<10}: {value}")
+        elif not self._inbox.push(msg):
+            logger.debug("Inbox full, dropped oldest message")
+
+    async def _notify_loop(self) -> None:
+        while True:
+            msg = await self._notifications.pop()
+            try:
+                res = self._notify_cb(msg)
+                if asyncio.iscoroutine(res):
+                    await res
+            except Exception as e:
+                logger.error(f"Device notification callback failed: {e}")
 
     def _require_info(self) -> InfoResponse:
         if self._info is None:
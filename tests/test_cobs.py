@@ -33,6 +33,16 @@ class TestCobs(unittest.TestCase):
         decoded = decode(encoded)
         self.assertEqual(decoded, data)
 
+    def test_encode_block_boundaries(self):
+        run = bytes(range(3, 255))
+        for n in (83, 84, 85, 168):
+            for tail in (b"", b"\x00", b"\x02\x01"):
+                data = run[:n] + tail + run[:n]
+                with self.subTest(n=n, tail=tail):
+                    encoded = encode(data)
+                    self.assertGreater(min(encoded), 2)
+                    self.assertEqual(decode(encoded), data)
+
     def test_pack_unpack(self):
         data = b"Hello, World!"
         packed = pack(data)
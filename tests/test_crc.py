@@ -0,0 +1,30 @@
+import unittest
+import sys
+from binascii import crc32
+
+sys.path.append("..")
+from spikeble._lib.crc import crc
+
+
+class TestCrc(unittest.TestCase):
+    def test_matches_zero_padded_crc32(self):
+        for n in range(9):
+            data = bytes(range(1, n + 1))
+            with self.subTest(n=n):
+                padded = data + b"\x00" * (-n % 4)
+                self.assertEqual(crc(data), crc32(padded))
+
+    def test_running_crc(self):
+        data = bytes(range(64))
+        running = 0
+        for i in range(0, len(data), 16):
+            running = crc(data[i : i + 16], running)
+        self.assertEqual(running, crc(data))
+
+    def test_memoryview(self):
+        data = b"import runloop\n"
+        self.assertEqual(crc(memoryview(data)[2:9]), crc(data[2:9]))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,252 @@
+import asyncio
+import struct
+import unittest
+import sys
+from unittest import mock
+
+sys.path.append("..")
+from spikeble._lib import cobs
+from spikeble._lib.crc import crc
+from spikeble._lib.messages import (
+    ClearSlotRequest,
+    ConsoleNotification,
+    InfoResponse,
+    StartFileUploadRequest,
+    TransferChunkRequest,
+    TransferChunkResponse,
+)
+from spikeble import run_str
+from spikeble.spike import Spike
+
+
+def _info(max_packet_size=20, max_chunk_size=16):
+    return InfoResponse(
+        1, 0, 0, 1, 0, 0, max_packet_size, 512, max_chunk_size, 0
+    )
+
+
+class FakeClient:
+    """Stand-in for BleakClient that acknowledges every request."""
+
+    is_connected = True
+
+    def __init__(self, hub, fail_at=None):
+        self.hub = hub
+        self.fail_at = fail_at
+        self.writes = []
+        self.chunks = []
+        self.upload_crc = None
+        self._buf = bytearray()
+
+    async def write_gatt_char(self, _char, data, response=False):
+        self.writes.append(bytes(data))
+        self._buf += data
+        while cobs.DELIMITER in self._buf:
+            i = self._buf.index(cobs.DELIMITER)
+            frame, self._buf = bytes(self._buf[: i + 1]), self._buf[i + 1 :]
+            self._reply(cobs.unpack(frame))
+
+    def _reply(self, payload):
+        ok = True
+        if payload[0] == StartFileUploadRequest.ID:
+            (self.upload_crc,) = struct.unpack_from("<I", payload, -4)
+        elif payload[0] == TransferChunkRequest.ID:
+            running_crc, _ = struct.unpack_from("<IH", payload, 1)
+            self.chunks.append(TransferChunkRequest(running_crc, payload[7:]))
+            ok = len(self.chunks) - 1 != self.fail_at
+        resp_id = payload[0] + 1
+        payload = struct.pack("<BB", resp_id, 0x00 if ok else 0x01)
+        loop = asyncio.get_running_loop()
+        loop.call_soon(self.hub._on_data, None, bytearray(cobs.pack(payload)))
+
+
+def _hub(max_chunk_size=16, **kwargs):
+    hub = Spike(timeout=1)
+    hub._client = FakeClient(hub, **kwargs)
+    hub._rx = object()
+    hub._connected = True
+    hub._info = _info(max_chunk_size=max_chunk_size)
+    hub._packet_size = hub._info.max_packet_size
+    return hub
+
+
+class TestUpload(unittest.TestCase):
+    def test_upload_chunks_in_order(self):
+        program = bytes(range(256)) * 2 + b"tail"
+
+        async def run(max_chunk_size):
+            hub = _hub(max_chunk_size)
+            await hub.upload_program(program, window=3)
+            return hub._client
+
+        for max_chunk_size in (16, 15):
+            with self.subTest(max_chunk_size=max_chunk_size):
+                client = asyncio.run(run(max_chunk_size))
+                self.assertEqual(client.upload_crc, crc(program))
+                chunks = client.chunks
+                payload = b"".join(c.payload for c in chunks)
+                self.assertEqual(payload, program)
+                running = 0
+                for chunk in chunks:
+                    running = crc(chunk.payload, running)
+                    self.assertEqual(chunk.running_crc, running)
+
+    def test_upload_failed_chunk_raises(self):
+        async def run():
+            hub = _hub(fail_at=2)
+            with self.assertRaises(RuntimeError):
+                await hub.upload_program(bytes(200))
+            self.assertFalse(hub._pending.get(TransferChunkResponse.ID))
+
+        asyncio.run(run())
+
+    def test_queued_frames_share_packets(self):
+        async def run():
+            hub = _hub()
+            for slot in range(3):
+                await hub._send(ClearSlotRequest(slot))
+            await asyncio.sleep(0.01)
+            return hub._client.writes
+
+        writes = asyncio.run(run())
+        self.assertEqual(len(writes), 1)
+        self.assertEqual(writes[0].count(cobs.DELIMITER), 3)
+
+    def test_write_error_fails_request(self):
+        async def run():
+            hub = _hub()
+
+            async def broken(*_args, **_kwargs):
+                raise OSError("link lost")
+
+            hub._client.write_gatt_char = broken
+            with self.assertRaises(OSError):
+                await hub.upload_program(bytes(200))
+
+        asyncio.run(run())
+
+    def test_disconnect_fails_pending_requests(self):
+        async def silent(*_args, **_kwargs):
+            pass
+
+        async def run(drop):
+            hub = _hub()
+            hub._client.write_gatt_char = silent
+            hub._client.is_connected = False
+            request = asyncio.create_task(hub.get_info())
+            await asyncio.sleep(0.01)
+            await drop(hub)
+            with self.assertRaises(ConnectionError):
+                await request
+
+        async def link_lost(hub):
+            hub._on_disconnect(hub._client)
+
+        for drop in (Spike.disconnect, link_lost):
+            with self.subTest(drop=drop.__name__):
+                asyncio.run(run(drop))
+
+
+class TestRun(unittest.TestCase):
+    def test_setup_failure_keeps_its_error_type(self):
+        class FailingSpike(Spike):
+            async def __aenter__(self):
+                return self
+
+            async def __aexit__(self, *_exc):
+                pass
+
+            async def get_info(self):
+                pass
+
+            async def enable_notifications(self, *_args):
+                raise RuntimeError("Failed to enable notifications")
+
+            async def clear_slot(self):
+                pass
+
+        with mock.patch("spikeble.spike.Spike", FailingSpike):
+            with self.assertRaises(RuntimeError):
+                asyncio.run(run_str("print(1)"))
+
+
+class TestDeframing(unittest.TestCase):
+    def test_split_and_batched_frames(self):
+        frames = [
+            cobs.pack(struct.pack("<BB", 0x47, 0x00)),
+            cobs.pack(b"\x21hello\x00"),
+            cobs.pack(struct.pack("<BB", 0x0D, 0x01)),
+        ]
+        stream = b"".join(frames)
+
+        received = []
+
+        class RecordingSpike(Spike):
+            def _dispatch(self, frame):
+                received.append(frame)
+
+        async def run():
+            hub = RecordingSpike()
+            for i in range(0, len(stream), 3):
+                hub._on_data(None, bytearray(stream[i : i + 3]))
+            return hub
+
+        hub = asyncio.run(run())
+        self.assertEqual([bytes(f) for f in received], frames)
+        self.assertEqual(hub._inbuf_pos, 0)
+        self.assertFalse(hub._inbuf)
+
+
+class TestInbox(unittest.TestCase):
+    def test_console_output_is_received(self):
+        async def run():
+            hub = Spike()
+            hub._on_data(None, bytearray(cobs.pack(b"\x21hello\x00")))
+            return await hub.recv(timeout=1)
+
+        msg = asyncio.run(run())
+        self.assertIsInstance(msg, ConsoleNotification)
+        self.assertEqual(msg.text, "hello")
+
+    def test_recv_many_drains_available(self):
+        async def run():
+            hub = Spike()
+            for text in (b"a", b"b", b"c"):
+                hub._on_data(None, bytearray(cobs.pack(b"\x21" + text)))
+            first = await hub.recv_many(max_n=2, timeout=1)
+            rest = await hub.recv_many(timeout=1)
+            return first, rest
+
+        first, rest = asyncio.run(run())
+        self.assertEqual([m.text for m in first], ["a", "b"])
+        self.assertEqual([m.text for m in rest], ["c"])
+
+    def test_recv_times_out(self):
+        async def run():
+            with self.assertRaises(TimeoutError):
+                await Spike().recv(timeout=0.01)
+
+        asyncio.run(run())
+
+    def test_async_device_notification_callback(self):
+        frame = cobs.pack(struct.pack("<BHBB", 0x3C, 2, 0x00, 100))
+
+        async def run():
+            hub = Spike()
+            seen = []
+
+            async def on_notify(msg):
+                seen.append(msg.messages)
+
+            hub.on_device_notification(on_notify)
+            for _ in range(3):
+                hub._on_data(None, bytearray(frame))
+            await asyncio.sleep(0)
+            await asyncio.sleep(0)
+            return seen
+
+        self.assertEqual(asyncio.run(run()), [[("Battery", (0, 100))]] * 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,47 @@
+import asyncio
+import unittest
+import sys
+
+sys.path.append("..")
+from spikeble._lib.spsc import SpscRing
+
+
+class TestSpscRing(unittest.TestCase):
+    def test_fifo_order(self):
+        ring = SpscRing(4)
+        for i in range(3):
+            self.assertTrue(ring.push(i))
+        self.assertEqual([ring.pop_nowait() for _ in range(3)], [0, 1, 2])
+        with self.assertRaises(IndexError):
+            ring.pop_nowait()
+
+    def test_overwrites_oldest_when_full(self):
+        ring = SpscRing(3)
+        results = [ring.push(i) for i in range(5)]
+        self.assertEqual(results, [True] * 3 + [False] * 2)
+        self.assertEqual(len(ring), 3)
+        self.assertEqual([ring.pop_nowait() for _ in range(3)], [2, 3, 4])
+
+    def test_clear(self):
+        ring = SpscRing(4)
+        for i in range(6):
+            ring.push(i)
+        ring.clear()
+        self.assertEqual(len(ring), 0)
+        ring.push("a")
+        self.assertEqual(ring.pop_nowait(), "a")
+
+    def test_pop_waits_for_push(self):
+        async def run():
+            ring = SpscRing()
+            waiter = asyncio.ensure_future(ring.pop())
+            await asyncio.sleep(0)
+            self.assertFalse(waiter.done())
+            ring.push("x")
+            return await waiter
+
+        self.assertEqual(asyncio.run(run()), "x")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,51 @@
+import functools
+import importlib.util
+import tempfile
+import textwrap
+import unittest
+import sys
+from pathlib import Path
+
+sys.path.append("..")
+from spikeble._utils import fn_to_string
+
+
+def _load(directory, name, source):
+    """Import `source` as a module from a real file so inspect can read it."""
+    path = Path(directory) / f"{name}.py"
+    path.write_text(textwrap.dedent(source))
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+class TestFnToString(unittest.TestCase):
+    def test_same_code_in_different_files(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            a = _load(tmp, "fn_a", "def main():\n    # one\n    print(1)\n")
+            b = _load(tmp, "fn_b", "def main():\n    # two\n    print(1)\n")
+            self.assertEqual(fn_to_string(a.main), "# one\nprint(1)\n")
+            self.assertEqual(fn_to_string(b.main), "# two\nprint(1)\n")
+
+    def test_decorated_function(self):
+        def decorator(f):
+            @functools.wraps(f)
+            def wrapper(*args, **kwargs):
+                return f(*args, **kwargs)
+
+            return wrapper
+
+        @decorator
+        def main():
+            print("hub")
+
+        self.assertEqual(fn_to_string(main), 'print("hub")\n')
+
+    def test_partial_raises_type_error(self):
+        with self.assertRaises(TypeError):
+            fn_to_string(functools.partial(print, "hub"))
+
+
+if __name__ == "__main__":
+    unittest.main()